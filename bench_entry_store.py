@@ -0,0 +1,130 @@
+# 对比缓存文件项的内存占用：每项一个字典 / SDK 模型对象 vs EntryStore
+# 字典与对象保存接口返回的全部字段（含下载地址），EntryStore 不保存下载地址
+# 用法：python bench_entry_store.py [文件数量]
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from entry_store import EntryStore
+
+try:
+    from ZfileSDK.utils.models import FileItemResult
+except ImportError:
+    FileItemResult = None
+
+
+class _Item:
+    """模拟 SDK 文件项属性的普通对象，供未安装 SDK 时使用。"""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def item_name(i: int) -> str:
+    if i % 10 == 0:
+        return f"sub_{i:08d}"
+    if i % 3 == 0:
+        return f"项目报告_第{i}版（终稿）.docx"
+    return f"IMG_{i:08d}.jpg"
+
+
+def make_items(count: int, per_dir: int = 200):
+    """模拟 ZFile 列表：文件带有按存储源与路径生成的下载地址，文件夹没有。"""
+    base = datetime(2024, 1, 1)
+    for i in range(count):
+        folder = f"/data/project_{i // (per_dir * 50)}/batch_{i // per_dir}"
+        name = item_name(i)
+        is_file = i % 10 != 0
+        yield folder, {
+            "name": name,
+            "path": folder,
+            "type": "FILE" if is_file else "FOLDER",
+            "size": i * 1024,
+            "time": base + timedelta(seconds=i),
+            "url": f"https://zfile.example.com/pd/local{quote(folder)}/{quote(name)}" if is_file else None,
+        }
+
+
+def measure(label: str, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return label, current, elapsed, container
+
+
+def build_dicts(count):
+    listings = {}
+    for folder, item in make_items(count):
+        listings.setdefault(folder, []).append(item)
+    return listings
+
+
+def build_models(count):
+    listings = {}
+    for folder, item in make_items(count):
+        listings.setdefault(folder, []).append(FileItemResult(**item))
+    return listings
+
+
+def build_objects(count):
+    listings = {}
+    for folder, item in make_items(count):
+        listings.setdefault(folder, []).append(_Item(**item))
+    return listings
+
+
+def build_store(count):
+    store = EntryStore()
+    listings = {}
+    for folder, item in make_items(count):
+        listings.setdefault(folder, []).append(_Item(**item))
+        if len(listings) > 1:
+            done = next(iter(listings))
+            store.put_dir(done, listings.pop(done))
+    for folder, items in listings.items():
+        store.put_dir(folder, items)
+    return store
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"文件项数量：{count}")
+
+    builders = [("dict", build_dicts)]
+    if FileItemResult is not None:
+        builders.append(("FileItemResult", build_models))
+    else:
+        builders.append(("object", build_objects))
+    builders.append(("EntryStore", build_store))
+
+    results = [measure(label, lambda b=builder: b(count)) for label, builder in builders]
+    baseline = results[0][1]
+    for label, current, elapsed, _ in results:
+        print(f"{label:>15}: {current / 1024 / 1024:8.2f} MB  {current / count:7.1f} B/项  "
+              f"构建 {elapsed:.2f}s  ({current / baseline:.1%})")
+
+    store = results[-1][3]
+    start = time.perf_counter()
+    for i in range(0, count, max(1, count // 10_000)):
+        folder = f"/data/project_{i // 10_000}/batch_{i // 200}"
+        name = item_name(i)
+        assert store.lookup(folder, name) is not None
+    lookups = len(range(0, count, max(1, count // 10_000)))
+    print(f"EntryStore 查找：{(time.perf_counter() - start) / lookups * 1e6:.1f} µs/次")
+
+    start = time.perf_counter()
+    scanned = sum(1 for _ in store.scan("/data/project_0"))
+    print(f"EntryStore 前缀扫描 /data/project_0：{scanned} 项，{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    matched = sum(1 for _ in store.scan("/", "报告"))
+    print(f"EntryStore 全量关键词匹配 '报告'：{matched} 项，{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import asyncio
+import posixpath
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Awaitable, Callable, Optional
+
+from astrbot.api import logger
+
+from .entry_store import EntryStore
+
+
+def normalize_path(path: str) -> str:
+    return posixpath.normpath("/" + (path or "").strip().lstrip("/"))
+
+
+class ListingCache:
+    """按 (storage_key, path) 缓存目录列表，带过期时间与 LRU 容量上限。
+
+    列表内容存放在每个存储源各自的 EntryStore 中，这里只记录过期时间等元信息。
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> [过期时间, 是否由预取写入且尚未被命中]
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()
+        self._stores: dict = {}
+        # 每个存储源的代数，invalidate 时递增；读取前记录的代数已过时的结果不再写入
+        self._generations: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def store(self, storage_key: str) -> EntryStore:
+        store = self._stores.get(storage_key)
+        if store is None:
+            store = self._stores[storage_key] = EntryStore()
+        return store
+
+    def _drop(self, key: tuple):
+        del self._entries[key]
+        self._stores[key[0]].drop_dir(key[1])
+
+    def get(self, storage_key: str, path: str) -> Optional[list]:
+        if not self.enabled:
+            return None
+        key = (storage_key, normalize_path(path))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if entry[1]:
+            entry[1] = False
+            self.prefetch_hits += 1
+        return self._stores[storage_key].list_dir(key[1])
+
+    def contains(self, storage_key: str, path: str) -> bool:
+        entry = self._entries.get((storage_key, normalize_path(path)))
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def generation(self, storage_key: str) -> int:
+        return self._generations.get(storage_key, 0)
+
+    def put(self, storage_key: str, path: str, files: list, prefetched: bool = False,
+            generation: Optional[int] = None):
+        """写入目录列表；generation 为发起读取时的代数，期间缓存被清除过则丢弃该结果。"""
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation(storage_key):
+            logger.debug(f"[ListingCache] {storage_key}:{path} 读取期间缓存已失效，丢弃结果")
+            return
+        key = (storage_key, normalize_path(path))
+        self.store(storage_key).put_dir(key[1], files)
+        self._entries[key] = [time.monotonic() + self.ttl, prefetched]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, storage_key: str, path: Optional[str] = None):
+        """清除缓存；给出 path 时清除该目录及其子目录，否则清除整个存储源。"""
+        prefix = normalize_path(path) if path is not None else None
+        self._generations[storage_key] = self.generation(storage_key) + 1
+        for key in list(self._entries):
+            if key[0] != storage_key:
+                continue
+            if prefix is None or key[1] == prefix or key[1].startswith(prefix.rstrip("/") + "/"):
+                self._drop(key)
+
+    def lookup(self, storage_key: str, path: str):
+        """在已缓存（未过期）的父目录中查找 path 对应的文件项，父目录未缓存或不存在该项时返回 None。"""
+        path = normalize_path(path)
+        parent = posixpath.dirname(path)
+        if path == "/" or not self.contains(storage_key, parent):
+            return None
+        return self._stores[storage_key].lookup(parent, posixpath.basename(path))
+
+    def search(self, storage_key: str, keyword: str, path: str = "/", limit: int = 200) -> list:
+        """在该存储源已缓存（未过期）的目录中按名称匹配关键词，用于后端搜索不可用时的兜底。"""
+        store = self._stores.get(storage_key)
+        if store is None:
+            return []
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if key[0] == storage_key and entry[0] < now:
+                self._drop(key)
+        return list(islice(store.scan(normalize_path(path), keyword), limit))
+
+    def entry_count(self) -> int:
+        return sum(len(store) for store in self._stores.values())
+
+    def memory_usage(self) -> int:
+        return sum(store.memory_usage() for store in self._stores.values())
+
+
+class Prefetcher:
+    """在返回目录列表后，于后台预取若干子目录与父目录的列表写入缓存。"""
+
+    def __init__(self, cache: ListingCache, fetch: Callable[[str, str], Awaitable[Optional[list]]],
+                 children: int = 5, concurrency: int = 2):
+        self.cache = cache
+        self.fetch = fetch
+        self.children = children
+        self.max_pending = max(1, concurrency) * 4
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._pending: set = set()
+        self._tasks: set = set()
+        self.issued = 0
+        self.dropped = 0
+
+    def schedule(self, storage_key: str, path: str, files: list):
+        path = normalize_path(path)
+        targets = [posixpath.join(path, item.name) for item in files if item.type == "FOLDER"][:self.children]
+        if path != "/":
+            targets.append(posixpath.dirname(path))
+        for target in targets:
+            key = (storage_key, target)
+            if key in self._pending or self.cache.contains(storage_key, target):
+                continue
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                continue
+            self._pending.add(key)
+            task = asyncio.create_task(self._prefetch(storage_key, target, self.cache.generation(storage_key)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, storage_key: str, path: str, generation: int):
+        try:
+            async with self._semaphore:
+                if self.cache.contains(storage_key, path):
+                    return
+                self.issued += 1
+                files = await self.fetch(storage_key, path)
+                if files is not None:
+                    self.cache.put(storage_key, path, files, prefetched=True, generation=generation)
+        except Exception as e:
+            logger.debug(f"[Prefetcher] 预取 {storage_key}:{path} 失败：{e}")
+        finally:
+            self._pending.discard((storage_key, path))
+
+    def stats_text(self) -> str:
+        cache = self.cache
+        lookups = cache.hits + cache.misses
+        hit_rate = cache.hits * 100 / lookups if lookups else 0
+        prefetch_rate = cache.prefetch_hits * 100 / self.issued if self.issued else 0
+        return (f"列表缓存：{cache.entry_count()} 项，约 {cache.memory_usage() / 1024:.1f} KB\n"
+                f"列表缓存命中率：{hit_rate:.1f}%（命中 {cache.hits} / 查询 {lookups}）\n"
+                f"预取命中率：{prefetch_rate:.1f}%（被使用 {cache.prefetch_hits} / 预取 {self.issued}，"
+                f"因并发上限丢弃 {self.dropped}）")
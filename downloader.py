@@ -0,0 +1,263 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from astrbot.api import logger
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+)")
+_UNSATISFIED_RANGE_RE = re.compile(r"bytes\s+\*/(\d+)")
+
+
+class _SegmentAborted(Exception):
+    """其他分段失败，本分段随之中止。"""
+
+
+class RangeDownloader:
+    """基于 HTTP Range 的分段并行下载器，支持断点续传。
+
+    下载过程中数据写入预分配的 `<resume_path>.part`，各分段的进度保存在
+    `<resume_path>.state.json`（resume_path 默认与 dest 相同）；中断后再次
+    下载同一 resume_path 时，若服务端文件的大小与 ETag/Last-Modified 未变化，
+    则只补齐缺失的部分。完成后移动到 dest。同一 resume_path 同时只允许一个
+    下载，后来者等待前者结束。服务端不支持 Range 时退化为单连接流式下载。
+    """
+
+    _active: set = set()
+    _active_lock = threading.Condition()
+
+    def __init__(self, segments: int = 4, min_segment_size: int = 8 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024, retries: int = 3, timeout: int = 60):
+        self.segments = max(1, segments)
+        self.min_segment_size = min_segment_size
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+
+    def download(self, url: str, dest: str, headers: Optional[dict] = None,
+                 progress: Optional[Callable[[int], None]] = None,
+                 check_cancelled: Optional[Callable[[], None]] = None,
+                 resume_path: Optional[str] = None, cancel_errors: tuple = ()) -> int:
+        """下载 url 到 dest，返回文件大小。
+
+        progress 接收新增的字节数（续传时会先回报已完成的字节数）；
+        check_cancelled 在每个分块之间（以及等待同一 resume_path 的其他下载
+        时）调用，抛出异常即可中止下载，已下载的部分会被保留以便续传；
+        抛出的是 cancel_errors 中的异常时视为用户取消，不再保留续传数据。
+        """
+        resume_path = resume_path or dest
+        with RangeDownloader._active_lock:
+            while resume_path in RangeDownloader._active:
+                if check_cancelled:
+                    check_cancelled()
+                RangeDownloader._active_lock.wait(0.5)
+            RangeDownloader._active.add(resume_path)
+        try:
+            headers = dict(headers or {})
+            size, validator = self._probe(url, headers)
+            if size is None:
+                logger.info(f"[RangeDownloader] 服务端不支持 Range，使用单连接下载：{dest}")
+                return self._download_single(url, dest, resume_path, headers, progress, check_cancelled)
+            return self._download_ranges(url, dest, resume_path, headers, size, validator, progress, check_cancelled)
+        except cancel_errors:
+            self.discard(resume_path)
+            raise
+        finally:
+            with RangeDownloader._active_lock:
+                RangeDownloader._active.discard(resume_path)
+                RangeDownloader._active_lock.notify_all()
+
+    def discard(self, resume_path: str):
+        """删除 resume_path 对应的未完成下载（.part 与状态文件），用于用户主动取消。"""
+        for path in (resume_path + ".part", resume_path + ".state.json", resume_path + ".state.json.tmp"):
+            self._remove(path)
+
+    @staticmethod
+    def sweep(directory: str, max_age: float) -> int:
+        """删除目录下超过 max_age 秒未修改的文件（不含子目录与正在下载的文件），返回删除数量。"""
+        with RangeDownloader._active_lock:
+            active = {os.path.basename(dest) for dest in RangeDownloader._active}
+        deadline = time.time() - max_age
+        removed = 0
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            base = entry.name
+            for suffix in (".tmp", ".state.json", ".part"):
+                base = base.removesuffix(suffix)
+            if base in active or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.info(f"[RangeDownloader] 已清理 {directory} 中 {removed} 个过期的临时文件")
+        return removed
+
+    def _probe(self, url: str, headers: dict):
+        """请求首字节以确认 Range 支持，返回 (文件大小, 校验信息)，不支持时大小为 None。"""
+        with requests.get(url, headers={**headers, "Range": "bytes=0-0"}, stream=True, timeout=self.timeout) as resp:
+            validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+            if resp.status_code == 416:
+                # 空文件无法满足 bytes=0-0，服务端以 Content-Range: bytes */0 表示文件大小
+                match = _UNSATISFIED_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+                if match:
+                    return int(match.group(1)), validator
+            resp.raise_for_status()
+            match = _CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+            if resp.status_code != 206 or not match:
+                return None, None
+            return int(match.group(3)), validator
+
+    def _download_single(self, url, dest, resume_path, headers, progress, check_cancelled) -> int:
+        part_path = resume_path + ".part"
+        size = 0
+        with requests.get(url, headers=headers, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            with open(part_path, "wb") as fp:
+                for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                    if check_cancelled:
+                        check_cancelled()
+                    fp.write(chunk)
+                    size += len(chunk)
+                    if progress:
+                        progress(len(chunk))
+        self._remove(resume_path + ".state.json")
+        os.replace(part_path, dest)
+        return size
+
+    def _download_ranges(self, url, dest, resume_path, headers, size, validator, progress, check_cancelled) -> int:
+        part_path = resume_path + ".part"
+        state_path = resume_path + ".state.json"
+        state = self._load_state(state_path, size, validator) if os.path.exists(part_path) else None
+
+        if state is None:
+            count = max(1, min(self.segments, math.ceil(size / self.min_segment_size)))
+            step = math.ceil(size / count) if size else 0
+            state = {
+                "size": size,
+                "validator": validator,
+                # 每个分段记录 [起始偏移, 结束偏移(含), 已完成字节数]
+                "segments": [[start, min(start + step, size) - 1, 0] for start in range(0, size, step or 1)],
+            }
+            with open(part_path, "wb") as fp:
+                fp.truncate(size)
+            self._save_state(state_path, state)
+        else:
+            resumed = sum(seg[2] for seg in state["segments"])
+            logger.info(f"[RangeDownloader] 从 {resumed}/{size} 字节处续传：{dest}")
+            if progress and resumed:
+                progress(resumed)
+
+        lock = threading.Lock()
+        aborted = threading.Event()
+
+        def check():
+            # 任一分段失败后其余分段尽快停止，已完成的部分保留在状态文件中
+            if check_cancelled:
+                check_cancelled()
+            if aborted.is_set():
+                raise _SegmentAborted()
+
+        def fetch_segment(seg: list):
+            attempt = 0
+            try:
+                while seg[0] + seg[2] <= seg[1]:
+                    before = seg[2]
+                    try:
+                        self._fetch_range(url, headers, part_path, seg, lock, state, state_path, progress, check)
+                        if seg[2] > before:
+                            continue
+                        error = "连接提前结束"
+                    except requests.RequestException as e:
+                        error = e
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise RuntimeError(f"分段 {seg[0]}-{seg[1]} 下载失败：{error}")
+                    logger.warning(f"[RangeDownloader] 分段 {seg[0]}-{seg[1]} 中断，第 {attempt} 次重试：{error}")
+            except BaseException:
+                aborted.set()
+                raise
+
+        pending = [seg for seg in state["segments"] if seg[0] + seg[2] <= seg[1]]
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                    futures = [executor.submit(fetch_segment, seg) for seg in pending]
+                errors = [f.exception() for f in futures if f.exception() is not None]
+                for error in errors:
+                    if not isinstance(error, _SegmentAborted):
+                        raise error
+        finally:
+            with lock:
+                self._save_state(state_path, state)
+
+        self._remove(state_path)
+        os.replace(part_path, dest)
+        return size
+
+    def _fetch_range(self, url, headers, part_path, seg, lock, state, state_path, progress, check_cancelled):
+        start = seg[0] + seg[2]
+        range_headers = {**headers, "Range": f"bytes={start}-{seg[1]}"}
+        with requests.get(url, headers=range_headers, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                raise RuntimeError("服务端在续传过程中不再支持 Range 请求")
+            with open(part_path, "r+b") as fp:
+                fp.seek(start)
+                # seg[2] 只记录已经落盘的字节数，保证状态文件不会领先于数据
+                written = seg[2]
+                try:
+                    for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                        if check_cancelled:
+                            check_cancelled()
+                        chunk = chunk[:seg[1] + 1 - (seg[0] + written)]
+                        fp.write(chunk)
+                        written += len(chunk)
+                        if progress:
+                            progress(len(chunk))
+                        if written - seg[2] >= 16 * self.chunk_size:
+                            fp.flush()
+                            with lock:
+                                seg[2] = written
+                                self._save_state(state_path, state)
+                finally:
+                    fp.flush()
+                    with lock:
+                        seg[2] = written
+
+    @staticmethod
+    def _load_state(state_path: str, size: int, validator: Optional[str]) -> Optional[dict]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("size") != size or state.get("validator") != validator:
+            logger.info(f"[RangeDownloader] 服务端文件已变化，放弃续传：{state_path}")
+            return None
+        return state
+
+    @staticmethod
+    def _save_state(state_path: str, state: dict):
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,205 @@
+import math
+from array import array
+from datetime import datetime
+from typing import Iterator, Optional
+
+FLAG_FOLDER = 1
+
+
+class FileEntry:
+    """文件项记录，AsyncZFileClient 的接口结果与 EntryStore 取出的缓存项共用。
+
+    接口结果中 time 为原始字符串，缓存项中为 datetime；缓存项不保存下载地址，
+    url 为 None，需要时由调用方另行获取后填入。
+    """
+
+    __slots__ = ("name", "path", "type", "size", "time", "url")
+
+    def __init__(self, name: str, path: str, type: str, size: int = 0, time=None, url: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.type = type
+        self.size = size
+        self.time = time
+        self.url = url
+
+    @classmethod
+    def from_json(cls, item: dict) -> "FileEntry":
+        return cls(item.get("name"), item.get("path"), item.get("type"), item.get("size") or 0,
+                   item.get("time"), item.get("url"))
+
+    @property
+    def is_folder(self) -> bool:
+        return self.type == "FOLDER"
+
+    def __repr__(self):
+        return f"FileEntry(name={self.name!r}, path={self.path!r}, type={self.type!r}, size={self.size})"
+
+
+class EntryStore:
+    """紧凑的文件项存储，用于缓存大量目录列表。
+
+    每个目录的文件项按原顺序连续存放为一个区块，另有按名称排序的下标数组
+    用于二分查找：名称以 UTF-8 拼接在
+    同一个 bytearray 中并用偏移数组定位，大小与修改时间存放在 array 中，
+    类型压缩为标志位，所在路径只保存一份并以编号引用。下载地址每项各不
+    相同且可由存储源与路径重新获取，因此不保存。
+
+    目录被替换或删除后旧区块成为空洞，空洞超过存活数据时自动整理。
+    """
+
+    def __init__(self):
+        self._parents: list = []
+        self._parent_ids: dict = {}
+        self._name_data = bytearray()
+        self._name_offsets = array("Q", [0])
+        self._parent_of = array("I")
+        self._sizes = array("q")
+        self._times = array("d")
+        self._flags = bytearray()
+        # 区块内按名称排序后的下标，供 lookup 二分查找
+        self._sorted = array("I")
+        # 目录路径 -> (起始下标, 数量)
+        self._blocks: dict = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes) - self._dead
+
+    def _intern(self, path: str) -> int:
+        parent_id = self._parent_ids.get(path)
+        if parent_id is None:
+            parent_id = len(self._parents)
+            self._parents.append(path)
+            self._parent_ids[path] = parent_id
+        return parent_id
+
+    def _name(self, index: int) -> str:
+        return self._name_data[self._name_offsets[index]:self._name_offsets[index + 1]].decode("utf-8")
+
+    def _entry(self, index: int) -> FileEntry:
+        timestamp = self._times[index]
+        return FileEntry(
+            self._name(index),
+            self._parents[self._parent_of[index]],
+            "FOLDER" if self._flags[index] & FLAG_FOLDER else "FILE",
+            self._sizes[index],
+            None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp),
+            None,
+        )
+
+    def _append(self, name: str, parent_id: int, size: int, timestamp: float, flags: int):
+        self._name_data += name.encode("utf-8")
+        self._name_offsets.append(len(self._name_data))
+        self._parent_of.append(parent_id)
+        self._sizes.append(size)
+        self._times.append(timestamp)
+        self._flags.append(flags)
+
+    def put_dir(self, dir_path: str, items) -> None:
+        """写入（或替换）一个目录的全部文件项，items 为带 name/path/type/size/time 属性的对象。"""
+        self.drop_dir(dir_path)
+        start = len(self._sizes)
+        for item in items:
+            time = item.time
+            self._append(
+                item.name or "",
+                self._intern(item.path if item.path is not None else dir_path),
+                item.size or 0,
+                time.timestamp() if isinstance(time, datetime) else math.nan,
+                FLAG_FOLDER if item.type == "FOLDER" else 0,
+            )
+        self._blocks[dir_path] = (start, len(self._sizes) - start)
+        self._sorted.extend(sorted(range(start, len(self._sizes)), key=self._name))
+
+    def drop_dir(self, dir_path: str) -> None:
+        block = self._blocks.pop(dir_path, None)
+        if block is None:
+            return
+        self._dead += block[1]
+        if self._dead > 1024 and self._dead > len(self):
+            self.compact()
+
+    def has_dir(self, dir_path: str) -> bool:
+        return dir_path in self._blocks
+
+    def list_dir(self, dir_path: str) -> Optional[list]:
+        block = self._blocks.get(dir_path)
+        if block is None:
+            return None
+        start, count = block
+        return [self._entry(index) for index in range(start, start + count)]
+
+    def lookup(self, dir_path: str, name: str) -> Optional[FileEntry]:
+        """在目录区块内按名称二分查找。"""
+        block = self._blocks.get(dir_path)
+        if block is None:
+            return None
+        lo, hi = block[0], block[0] + block[1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(self._sorted[mid]) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < block[0] + block[1] and self._name(self._sorted[lo]) == name:
+            return self._entry(self._sorted[lo])
+        return None
+
+    def _scan_indices(self, prefix: str) -> Iterator[int]:
+        prefix = prefix.rstrip("/")
+        for dir_path, (start, count) in self._blocks.items():
+            if not prefix or dir_path == prefix or dir_path.startswith(prefix + "/"):
+                yield from range(start, start + count)
+
+    def scan(self, prefix: str = "/", keyword: Optional[str] = None) -> Iterator[FileEntry]:
+        """遍历路径位于 prefix 之下的所有已缓存目录中的文件项，可按名称关键词（不区分大小写）过滤。
+
+        过滤直接在名称数据上进行，只为匹配的文件项创建对象。
+        """
+        if keyword is None:
+            for index in self._scan_indices(prefix):
+                yield self._entry(index)
+            return
+        keyword = keyword.lower()
+        for index in self._scan_indices(prefix):
+            if keyword in self._name(index).lower():
+                yield self._entry(index)
+
+    def compact(self) -> None:
+        """丢弃已删除区块占用的空间，重新紧凑排列存活的文件项。"""
+        name_data, name_offsets, parent_of = self._name_data, self._name_offsets, self._parent_of
+        sizes, times, flags, sorted_ = self._sizes, self._times, self._flags, self._sorted
+        parents, blocks = self._parents, self._blocks
+
+        self._name_data = bytearray()
+        self._name_offsets = array("Q", [0])
+        self._parent_of = array("I")
+        self._sizes = array("q")
+        self._times = array("d")
+        self._flags = bytearray()
+        self._sorted = array("I")
+        self._blocks = {}
+        self._dead = 0
+        # 只保留仍被引用的所在路径
+        self._parents = []
+        self._parent_ids = {}
+
+        for dir_path, (start, count) in blocks.items():
+            new_start = len(self._sizes)
+            for index in range(start, start + count):
+                self._append(
+                    name_data[name_offsets[index]:name_offsets[index + 1]].decode("utf-8"),
+                    self._intern(parents[parent_of[index]]), sizes[index], times[index], flags[index],
+                )
+            self._sorted.extend(i - start + new_start for i in sorted_[start:start + count])
+            self._blocks[dir_path] = (new_start, count)
+
+    def memory_usage(self) -> int:
+        """估算占用的字节数（不含解释器的固定开销）。"""
+        total = len(self._name_data) + len(self._flags)
+        for arr in (self._name_offsets, self._parent_of, self._sizes, self._times, self._sorted):
+            total += arr.itemsize * len(arr)
+        total += sum(len(p) + 49 for p in self._parents)
+        total += len(self._blocks) * 100
+        return total
@@ -0,0 +1,208 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from astrbot.api import logger
+
+
+class JobCancelled(Exception):
+    """任务被用户取消。"""
+
+
+class Job:
+    """后台任务，记录状态与字节/项目两种进度。
+
+    进度字段会在工作线程中更新，因此只做简单的整数累加；取消标记使用
+    threading.Event，工作线程可以在分块传输之间调用 check_cancelled()。
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    STATUS_TEXT = {
+        QUEUED: "排队中",
+        RUNNING: "执行中",
+        DONE: "已完成",
+        FAILED: "失败",
+        CANCELLED: "已取消",
+    }
+
+    def __init__(self, kind: str, description: str, owner, origin: str,
+                 func: Callable[["Job"], Awaitable[list]]):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.description = description
+        self.owner = owner
+        self.origin = origin
+        self.func = func
+
+        self.status = Job.QUEUED
+        self.error: Optional[str] = None
+        self.result: list = []
+        self.cleanup_paths: list = []
+
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.items_done = 0
+        self.items_total = 0
+
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._cancel_event = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def add_bytes(self, n: int):
+        self.bytes_done += n
+
+    def add_items(self, n: int = 1):
+        self.items_done += n
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress_text(self, human_size: Callable[[int], str]) -> str:
+        status = Job.STATUS_TEXT[self.status]
+        if self.status == Job.RUNNING and self.cancelled:
+            status += "（正在取消）"
+        parts = [f"[{self.id}] {self.description} - {status}"]
+        if self.bytes_total:
+            percent = self.bytes_done * 100 / self.bytes_total
+            parts.append(f"{human_size(self.bytes_done)}/{human_size(self.bytes_total)} ({percent:.1f}%)")
+        elif self.bytes_done:
+            parts.append(human_size(self.bytes_done))
+        if self.items_total:
+            parts.append(f"{self.items_done}/{self.items_total} 项")
+        if self.started_at:
+            parts.append(f"耗时 {(self.finished_at or time.time()) - self.started_at:.1f}s")
+        if self.error:
+            parts.append(f"错误：{self.error}")
+        return "，".join(parts)
+
+
+class JobManager:
+    """固定数量的协程工作者从队列中取出任务执行，结束后通过 notify 回调推送结果。"""
+
+    def __init__(self, workers: int, notify: Callable[[Job], Awaitable[None]], keep_finished: int = 100):
+        self.workers = max(1, workers)
+        self.notify = notify
+        self.keep_finished = keep_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: list = []
+        self._notify_tasks: set = set()
+        self._stopping = False
+
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"[JobManager] 已启动 {self.workers} 个后台任务工作者")
+
+    async def stop(self):
+        self._stopping = True
+        for job in self._jobs.values():
+            if not job.finished:
+                job._cancel_event.set()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, kind: str, description: str, owner, origin: str,
+               func: Callable[[Job], Awaitable[list]]) -> Job:
+        if not self._worker_tasks:
+            self.start()
+        job = Job(kind, description, owner, origin, func)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._trim()
+        logger.info(f"[JobManager] 提交任务 {job.id}: {description}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, owner=None) -> list:
+        return [job for job in self._jobs.values() if owner is None or job.owner == owner]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel_event.set()
+        if job.status == Job.QUEUED:
+            # 排队中的任务不会再被执行，这里直接推送取消结果
+            job.status = Job.CANCELLED
+            job.finished_at = time.time()
+            logger.info(f"[JobManager] 排队中的任务 {job.id} 已取消")
+            task = asyncio.create_task(self._notify(job))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+        else:
+            # 取消是协作式的：任务在下一次 check_cancelled() 时抛出 JobCancelled，
+            # 在此之前仍占用工作者，结束后才标记为已取消
+            logger.info(f"[JobManager] 已请求取消任务 {job.id}")
+        return True
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.finished:
+                    continue
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        job._task = asyncio.create_task(job.func(job))
+        try:
+            job.result = await job._task
+            job.status = Job.DONE
+        except (asyncio.CancelledError, JobCancelled):
+            if self._stopping or not job.cancelled:
+                # 工作者本身被取消（插件卸载），不再推送结果
+                job._task.cancel()
+                job.status = Job.CANCELLED
+                raise
+            job.status = Job.CANCELLED
+        except Exception as e:
+            logger.error(f"[JobManager] 任务 {job.id} 执行失败：{e}", exc_info=True)
+            job.status = Job.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+        await self._notify(job)
+
+    async def _notify(self, job: Job):
+        try:
+            await self.notify(job)
+        except Exception as e:
+            logger.error(f"[JobManager] 推送任务 {job.id} 结果失败：{e}", exc_info=True)
@@ -1,16 +1,53 @@
+import asyncio
+import fnmatch
+import hashlib
 import os
+import io
+import posixpath
+import tempfile
 import typing
 
 import requests
 from ZfileSDK.utils.models import DeleteItem, BatchGenerateLinkRequest  # noqa: F401
-from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
 
 from ZfileSDK.utils import ApiClient
 from ZfileSDK.front import *  # noqa: F403
 from ZfileSDK.admin import *  # noqa: F403
-from astrbot.core.message.components import Reply, File, Image, Video, BaseMessageComponent
+from astrbot.core.message.components import Reply, File, Image, Video, Plain, BaseMessageComponent
+
+from .cache import ListingCache, Prefetcher
+from .downloader import RangeDownloader
+from .jobs import Job, JobCancelled, JobManager
+from .processing import UploadProcessor
+from .thumbnail import ThumbnailService
+from .zfile_sdk_client import AsyncZFileClient
+
+# 这些上传类型由 ZFile 返回预签名 PUT 地址，可绕过 ZFile 服务端直接写入存储
+DIRECT_UPLOAD_TYPES = ("S3",)
+
+# 临时目录中超过该时长（秒）未更新的下载文件与续传数据会被清理
+STALE_DOWNLOAD_AGE = 24 * 3600
+
+
+class _ProgressReader:
+    """把源响应包装为带长度的只读流，使 requests 以 Content-Length 方式流式上传。"""
+
+    def __init__(self, raw, size: int, job: Job):
+        self._raw = raw
+        self._size = size
+        self._job = job
+
+    def __len__(self):
+        return self._size
+
+    def read(self, n: int = -1) -> bytes:
+        self._job.check_cancelled()
+        data = self._raw.read(n)
+        self._job.add_bytes(len(data))
+        return data
 
 
 @register("zfile_plugin", "溜溜球", "基于 ZFile API 的文件管理插件", "0.1.0")
@@ -26,12 +63,53 @@ class ZFilePlugin(Star):
         self.admins = config['admins']
         self.perm = config['permissions']
 
+        # 批量操作时同时在途的 SDK 请求上限（SDK 为同步实现，放入线程执行）
+        self._sdk_semaphore = asyncio.Semaphore(max(1, int(config.get('batch_concurrency', 8))))
+
+        # 跨存储源搜索等需要大量并发请求的场景使用异步客户端
+        self.async_zf = AsyncZFileClient(config['zfile_base_url'], config['access_token'],
+                                         concurrency=int(config.get('batch_concurrency', 8)))
+        self.search_timeout = float(config.get('search_timeout', 10))
+
+        # 上传/下载等耗时传输放入后台任务队列，处理函数立即返回任务 ID
+        self.jobs = JobManager(int(config.get('job_workers', 2)), self._notify_job)
+        self._work_dir = os.path.join(tempfile.gettempdir(), "astrbot_zfile")
+        os.makedirs(self._work_dir, exist_ok=True)
+        self.downloader = RangeDownloader(segments=int(config.get('download_segments', 4)))
+        self.thumbnails = ThumbnailService(os.path.join(self._work_dir, "thumbnails"), config)
+        self.preview_max_items = int(config.get('preview_max_items', 6))
+
+        # 超过该大小的文件不再经由机器人中转：下载直接回复链接，上传尽量直传存储
+        self.direct_threshold = int(config.get('direct_transfer_threshold_mb', 100)) * 1024 * 1024
+        self.short_link_expire_time = int(config.get('short_link_expire_time', 86400))
+
+        # 上传前按 MIME 类型压缩/转码的可选处理阶段
+        self.upload_processor = UploadProcessor(config.get('upload_processing') or {})
+
+        # 目录列表缓存；开启预取后，返回列表时会在后台预热子目录与父目录
+        self.listing_cache = ListingCache(ttl=float(config.get('listing_cache_ttl', 60)))
+        self.prefetch_enabled = bool(config.get('prefetch_enabled', False)) and self.listing_cache.enabled
+        self.prefetcher = Prefetcher(
+            self.listing_cache,
+            self._fetch_listing,
+            children=int(config.get('prefetch_children', 5)),
+            concurrency=int(config.get('prefetch_concurrency', 2)),
+        )
+
     async def initialize(self):
         user_interface = UserInterface(self.zf)  # noqa: F405
         check = user_interface.login_check()
         logger.info("ZFile 插件就绪：" + check.data.to_str())
+        self.jobs.start()
+        await asyncio.to_thread(RangeDownloader.sweep, self._work_dir, STALE_DOWNLOAD_AGE)
         return check.data.is_login
 
+    async def terminate(self):
+        await self.jobs.stop()
+        await self.async_zf.close()
+        self.upload_processor.shutdown()
+        self.thumbnails.shutdown()
+
     @staticmethod
     def _uid(evt: AstrMessageEvent):
         uid = None
@@ -67,6 +145,286 @@ class ZFilePlugin(Star):
         else:
             return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
 
+    async def _notify_job(self, job: Job):
+        if job.status == Job.DONE:
+            chain = job.result or [Plain(f"✅ 任务 {job.id} 已完成：{job.description}")]
+            if job.cancelled:
+                # 收到取消请求时任务已进入无法中断的最后一步
+                chain = [Plain(f"⚠️ 任务 {job.id} 的取消请求到达过晚，任务已执行完毕。\n")] + chain
+        elif job.status == Job.CANCELLED:
+            chain = [Plain(f"🛑 任务 {job.id} 已取消：{job.description}")]
+        else:
+            chain = [Plain(f"❌ 任务 {job.id} 失败：{job.description}\n{job.error}")]
+        try:
+            await self.context.send_message(job.origin, MessageChain(chain=chain))
+        finally:
+            for path in job.cleanup_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _open_source(url: str) -> requests.Response:
+        """以流方式打开源地址；要求不压缩传输，使响应长度与实际字节一致。"""
+        resp = requests.get(url, headers={"Accept-Encoding": "identity"}, stream=True, timeout=60)
+        try:
+            resp.raise_for_status()
+        except requests.RequestException:
+            resp.close()
+            raise
+        return resp
+
+    @staticmethod
+    def _fetch(job: Job, src: requests.Response, fp: typing.BinaryIO):
+        """在工作线程中分块读取已打开的响应写入 fp，并更新任务字节进度。"""
+        job.bytes_total = int(src.headers.get("Content-Length") or 0) or job.bytes_total
+        for chunk in src.iter_content(chunk_size=1024 * 1024):
+            job.check_cancelled()
+            fp.write(chunk)
+            job.add_bytes(len(chunk))
+
+    async def _fetch_listing(self, storage_key: str, path: str):
+        file_list_module = FileListModule(self.zf)  # noqa: F405
+        files = await asyncio.to_thread(file_list_module.storage_files, storage_key=storage_key, path=path)
+        # 检查 files 是否有效以及是否包含有效的 data 和 files
+        if files and files.data and hasattr(files.data, 'files'):
+            return files.data.files or []
+        return None
+
+    @staticmethod
+    def _search_rank(keyword: str, item) -> tuple:
+        name = (item.name or "").lower()
+        keyword = keyword.lower()
+        if name == keyword:
+            score = 0
+        elif name.startswith(keyword):
+            score = 1
+        elif keyword in name:
+            score = 2
+        else:
+            score = 3
+        return score, not item.is_folder, len(name), name
+
+    async def _search_all_storages(self, keyword: str, path: str):
+        """并发搜索所有启用了搜索的存储源，单个存储源超时不影响其他结果。
+
+        各存储源的结果按完成顺序收集，全部返回或超时后统一按相关度排序。
+        返回 ([(storage_key, item), ...], 超时的存储源, 失败信息)；没有启用搜索的存储源时返回 None。
+        """
+        res = await self.async_zf.storage_list()
+        if not res.ok:
+            raise ValueError(f"获取存储源列表失败：{res.msg}")
+        storages = [s for s in res.data or [] if s.search_enable]
+        if not storages:
+            return None
+
+        async def search_one(storage_key: str):
+            # 超时只作用于请求本身，存储源较多时在客户端并发上限处排队的时间不计入
+            try:
+                return storage_key, await self.async_zf.search(keyword, storage_key, path, timeout=self.search_timeout)
+            except asyncio.TimeoutError:
+                return storage_key, None
+            except Exception as e:
+                return storage_key, e
+
+        merged, slow, errors = [], [], []
+        for fut in asyncio.as_completed([search_one(s.key) for s in storages]):
+            storage_key, result = await fut
+            if result is None:
+                slow.append(storage_key)
+            elif isinstance(result, Exception):
+                errors.append(f"{storage_key}：{result}")
+            elif not result.ok:
+                errors.append(f"{storage_key}：{result.msg}")
+            else:
+                merged.extend((storage_key, item) for item in result.data or [])
+        # 超时的存储源用已缓存目录中的匹配项补充
+        for storage_key in slow:
+            merged.extend((storage_key, item) for item in self.listing_cache.search(storage_key, keyword, path))
+        merged.sort(key=lambda pair: self._search_rank(keyword, pair[1]))
+        return merged, slow, errors
+
+    @staticmethod
+    def _relay_stream(job: Job, src: requests.Response, dest_url: str, size: int):
+        """将已打开的源响应以流的方式 PUT 到目标地址，不在内存中缓存整个文件。"""
+        resp = requests.put(dest_url, data=_ProgressReader(src.raw, size, job), timeout=60)
+        resp.raise_for_status()
+
+    async def _storage_upload_type(self, storage_key: str, path: str):
+        site_basic_module = SiteBasicModule(self.zf)  # noqa: F405
+        try:
+            res = await asyncio.to_thread(site_basic_module.config_storage, storage_key=storage_key, path=path)
+        except Exception as e:
+            logger.warning(f"[ZFilePlugin] 获取存储源 {storage_key} 上传类型失败：{e}")
+            return None
+        if res.code != "0" or not res.data or not res.data.metadata:
+            return None
+        return res.data.metadata.upload_type
+
+    async def _direct_link(self, storage_key: str, file_path: str, fallback_url: str) -> str:
+        direct_short_chain_module = DirectShortChainModule(self.zf)  # noqa: F405
+        try:
+            res = await asyncio.to_thread(
+                direct_short_chain_module.short_link_batch_generate,
+                storage_key=storage_key,
+                paths=[file_path],
+                expire_time=self.short_link_expire_time,
+            )
+            if res.msg == "ok" and res.data:
+                return res.data[0].address
+            logger.warning(f"[ZFilePlugin] 生成短链失败，改用直链：{res.msg}")
+        except Exception as e:
+            logger.warning(f"[ZFilePlugin] 生成短链失败，改用直链：{e}")
+        return fallback_url
+
+    @staticmethod
+    def _split_storage_path(full_path_with_storage: str, default_storage_key: str = None):
+        if ":" in full_path_with_storage:
+            storage_key, item_path = full_path_with_storage.split(":", 1)
+            return storage_key.strip() or default_storage_key, item_path.strip()
+        return default_storage_key, full_path_with_storage.strip()
+
+    @staticmethod
+    def _invalid_new_name(new_name: str) -> typing.Optional[str]:
+        """检查重命名的新名称，不合法时返回原因。"""
+        if not new_name:
+            return "新名称不能为空"
+        if "/" in new_name or "\\" in new_name:
+            return "新名称不能包含路径分隔符"
+        if new_name in (".", ".."):
+            return f"新名称不能为 '{new_name}'"
+        return None
+
+    async def _call_sdk(self, func, *args, **kwargs):
+        async with self._sdk_semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _expand_pattern(self, storage_key: str, pattern: str) -> list:
+        """将路径或通配符展开为文件项列表，通配符只作用于最后一级名称。"""
+        file_list_module = FileListModule(self.zf)  # noqa: F405
+        parent, base = posixpath.split(pattern.rstrip("/") or "/")
+        if not any(c in base for c in "*?["):
+            res = await self._call_sdk(file_list_module.storage_files_item, storage_key=storage_key, path=pattern)
+            if res.code != "0" or not res.data:
+                raise ValueError(res.msg)
+            return [res.data]
+
+        res = await self._call_sdk(file_list_module.storage_files, storage_key=storage_key, path=parent or "/")
+        if res.code != "0" or not res.data:
+            raise ValueError(res.msg)
+        return [item for item in res.data.files or [] if fnmatch.fnmatchcase(item.name, base)]
+
+    async def _expand_patterns(self, patterns: list, default_storage_key: str = None):
+        """并发展开多个路径/通配符，返回 ([(storage_key, item), ...], [错误信息, ...])。"""
+        targets = [self._split_storage_path(p, default_storage_key) for p in patterns if p]
+        results = await asyncio.gather(
+            *[self._expand_pattern(storage_key, path) for storage_key, path in targets],
+            return_exceptions=True,
+        )
+        items, errors = [], []
+        for (storage_key, path), res in zip(targets, results):
+            if isinstance(res, Exception):
+                errors.append(f"❌ 无法获取 '{storage_key}:{path}'：{res}")
+            elif not res:
+                errors.append(f"⚠️ '{storage_key}:{path}' 没有匹配的项目。")
+            else:
+                items.extend((storage_key, item) for item in res)
+        return items, errors
+
+    async def _run_batch(self, event: AstrMessageEvent, label: str, coros: list):
+        """并发执行批量任务，任务较多时按进度推送中间消息，最后推送汇总结果。
+
+        每个协程返回 (成功数, 失败数, [失败信息])。
+        """
+        total = len(coros)
+        step = max(1, total // 4)
+        finished = succeeded = failed = 0
+        lines = []
+        for fut in asyncio.as_completed(coros):
+            try:
+                ok, bad, messages = await fut
+            except Exception as e:
+                logger.error(f"[ZFilePlugin] {label}执行失败：{e}", exc_info=True)
+                ok, bad, messages = 0, 1, [f"❌ {label}时发生错误：{e}"]
+            succeeded += ok
+            failed += bad
+            lines.extend(messages)
+            finished += 1
+            if total >= 8 and finished % step == 0 and finished < total:
+                yield event.plain_result(f"⏳ {label}进度：{finished}/{total} 批，成功 {succeeded} 项，失败 {failed} 项")
+        summary = f"{'✅' if not failed else '⚠️'} {label}完成：成功 {succeeded} 项，失败 {failed} 项。"
+        yield event.plain_result("\n".join([summary] + lines))
+
+    async def _move_or_copy(self, event: AstrMessageEvent, action: str):
+        label = "移动" if action == "move" else "复制"
+        uid = self._uid(event)
+        if not self._check_permission(uid, "operate", "operate_admin_only"):
+            yield event.plain_result(f"你没有权限执行{label}操作。")
+            return
+
+        parts = event.message_str.strip().split(maxsplit=2)
+        if len(parts) < 3:
+            yield event.plain_result(
+                f"批量{label}命令格式：批量{label} [storageKey:]path1,[storageKey:]pattern2,... [storageKey:]目标目录\n"
+                f"例如：批量{label} local:/photos/*.jpg,local:/docs/a.txt local:/archive"
+            )
+            return
+
+        target_storage_key, target_path = self._split_storage_path(parts[2].strip())
+        if not target_storage_key:
+            yield event.plain_result("错误：请为目标目录提供存储源key。例如：local:/archive")
+            return
+
+        patterns = [p.strip() for p in parts[1].split(',')]
+        items, results = await self._expand_patterns(patterns, target_storage_key)
+
+        # 同一目录下同类型的项目合并为一个请求，再按批大小切分后并发执行
+        groups = {}
+        for storage_key, item in items:
+            if storage_key != target_storage_key:
+                results.append(f"❌ '{storage_key}:{item.path}/{item.name}' 与目标不在同一存储源，跳过。")
+                continue
+            _type = "folder" if item.type == "FOLDER" else "file"
+            groups.setdefault((item.path, _type), []).append(item.name)
+
+        file_operation_module = FileOperationModule(self.zf)  # noqa: F405
+        chunk_size = 50
+
+        async def run(path: str, _type: str, names: list):
+            res = await self._call_sdk(
+                file_operation_module.action_type,
+                action=action,
+                _type=_type,
+                storage_key=target_storage_key,
+                path=path,
+                name_list=names,
+                target_path=target_path,
+                target_name_list=names,
+            )
+            if res.code != "0":
+                return 0, len(names), [f"❌ {label} '{path}' 下 {len(names)} 项失败：{res.msg}"]
+            failures = [r for r in res.data or [] if not r.success]
+            return (len(names) - len(failures), len(failures),
+                    [f"❌ {posixpath.join(r.path or path, r.name or '')}：{r.message}" for r in failures])
+
+        coros = [
+            run(path, _type, names[i:i + chunk_size])
+            for (path, _type), names in groups.items()
+            for i in range(0, len(names), chunk_size)
+        ]
+        if not coros:
+            yield event.plain_result("\n".join(results) or f"没有需要{label}的项目。")
+            return
+
+        logger.info(f"[ZFilePlugin] 批量{label} {sum(len(n) for n in groups.values())} 项到 "
+                    f"{target_storage_key}:{target_path}，共 {len(coros)} 批")
+        if results:
+            yield event.plain_result("\n".join(results))
+        async for result in self._run_batch(event, f"批量{label}", coros):
+            yield result
+        self.listing_cache.invalidate(target_storage_key)
+
 
 @filter.command("文件列表")
 async def cmd_ls(self, event: AstrMessageEvent):
@@ -90,15 +448,22 @@ async def cmd_ls(self, event: AstrMessageEvent):
         return
 
     try:
-        file_list_module = FileListModule(self.zf)  # noqa: F405
-        files = file_list_module.storage_files(
-            storage_key=storage_key,
-            path=path
-        )
-
-        # 检查 files 是否有效以及是否包含有效的 data 和 files
-        if files and files.data and hasattr(files.data, 'files'):
-            files_list = files.data.files
+        files_list = self.listing_cache.get(storage_key, path)
+        if files_list is None:
+            # 父目录已缓存且显示该路径是文件时，无需再请求后端
+            cached_item = self.listing_cache.lookup(storage_key, path)
+            if cached_item is not None and not cached_item.is_folder:
+                yield event.plain_result(
+                    f"'{path}' 是文件（{self._human_readable_size(cached_item.size)}），不是文件夹。")
+                return
+            generation = self.listing_cache.generation(storage_key)
+            files_list = await self._fetch_listing(storage_key, path)
+            if files_list is not None:
+                self.listing_cache.put(storage_key, path, files_list, generation=generation)
+
+        if files_list is not None:
+            if self.prefetch_enabled:
+                self.prefetcher.schedule(storage_key, path, files_list)
             if not files_list:
                 yield event.plain_result(f"路径 '{path}' 下没有内容。")
                 return
@@ -151,37 +516,78 @@ async def cmd_upload(self, event: AstrMessageEvent):
         if replay_message.type in ["File", "Image", "Video"]:
             replay_message: typing.Optional[File, Image, Video] # type: ignore
             file_url = replay_message.url
-            file_data = requests.get(file_url).content
         else:
             yield event.plain_result("请引用你要上传的文件")
             return
 
-    file_size = len(file_data)
-
     logger.info(f"[ZFilePlugin] 准备上传 {file_name} 到 {storage_key}:{remote_path}")
 
-    try:
+    async def run_direct(job: Job, src: requests.Response, file_size: int):
+        job.bytes_total = file_size
         file_module = FileOperationModule(self.zf)  # noqa: F405
-        file_module.upload_file(
+        response = await asyncio.to_thread(
+            file_module.upload_file,
             storage_key=storage_key,
             path=remote_path,
             name=file_name,
             size=file_size,
         )
+        if response.code != "0" or not response.data:
+            raise ValueError(f"获取直传地址失败：{response.msg}")
+        await asyncio.to_thread(self._relay_stream, job, src, response.data, file_size)
+        job.add_items()
+        self.listing_cache.invalidate(storage_key)
+        return [Plain(f"✅ 文件 '{file_name}' 已直传至存储源 '{storage_key}'。")]
+
+    async def run(job: Job):
+        job.items_total = 1
+        src = await asyncio.to_thread(self._open_source, file_url)
+        try:
+            # 文件大小取自实际传输的响应，直传时作为 PUT 的 Content-Length
+            file_size = int(src.headers.get("Content-Length") or 0)
+            identity = src.headers.get("Content-Encoding", "identity").lower() == "identity"
+            if self.direct_threshold and file_size > self.direct_threshold and identity:
+                upload_type = await self._storage_upload_type(storage_key, remote_path)
+                direct = upload_type in DIRECT_UPLOAD_TYPES
+                logger.info(f"[ZFilePlugin] 大文件上传 {file_name}（{file_size} B），存储源上传类型 {upload_type}，直传：{direct}")
+                if direct:
+                    return await run_direct(job, src, file_size)
+            elif self.direct_threshold and (not file_size or not identity):
+                logger.warning(f"[ZFilePlugin] 无法确定 {file_name} 的原始大小，经由机器人中转上传")
+
+            buffer = io.BytesIO()
+            await asyncio.to_thread(self._fetch, job, src, buffer)
+        finally:
+            src.close()
+        file_data, upload_name, note = await self.upload_processor.process(buffer.getvalue(), file_name)
+        job.check_cancelled()
+
+        file_module = FileOperationModule(self.zf)  # noqa: F405
+        await asyncio.to_thread(
+            file_module.upload_file,
+            storage_key=storage_key,
+            path=remote_path,
+            name=upload_name,
+            size=len(file_data),
+        )
 
         file_upload_model = FileUploadStorageKey(self.zf)  # noqa: F405
-        response = file_upload_model.upload_proxy(
+        response = await asyncio.to_thread(
+            file_upload_model.upload_proxy,
             storage_key=storage_key,
             path=remote_path,
             filestream=file_data,
-            filename=file_name,
+            filename=upload_name,
         )
-        uploaded_files_info = f"✅ 文件 '{file_name}' 上传成功: {response.msg}"
-    except Exception as e:
-        logger.error(f"[ZFilePlugin] 上传文件 '{file_name}' 出错：{e}", exc_info=True)
-        uploaded_files_info = f"❌ 文件 '{file_name}' 上传失败：{e}"
+        job.add_items()
+        self.listing_cache.invalidate(storage_key)
+        if note:
+            return [Plain(f"✅ 文件 '{file_name}' 已处理为 '{upload_name}' 并上传成功（{note}）: {response.msg}")]
+        return [Plain(f"✅ 文件 '{file_name}' 上传成功: {response.msg}")]
 
-    yield event.plain_result(uploaded_files_info)
+    job = self.jobs.submit("upload", f"上传 {file_name} 到 {storage_key}:{remote_path}", uid,
+                           event.unified_msg_origin, run)
+    yield event.plain_result(f"📤 已提交上传任务 {job.id}，完成后会推送到当前会话。可使用 任务状态 {job.id} 查看进度。")
 
 
 @filter.command("下载文件")
@@ -210,25 +616,128 @@ async def cmd_download(self, event: AstrMessageEvent):
 
     logger.info(f"[ZFilePlugin] 下载文件: storage_key={storage_key}, file_path={file_path}")
 
+    downloaded_file_name = os.path.basename(file_path)
+
+    file_list_module = FileListModule(self.zf)  # noqa: F405
     try:
-        file_list_module = FileListModule(self.zf)  # noqa: F405
-        file = file_list_module.storage_files_item(
+        file = await asyncio.to_thread(
+            file_list_module.storage_files_item,
             storage_key=storage_key,
             path=file_path
         )
+    except Exception as e:
+        logger.error(f"[ZFilePlugin] 下载文件时出错：{e}", exc_info=True)
+        yield event.plain_result(f"处理下载文件时发生错误：{e}")
+        return
+    if file.code != "0" or not file.data:
+        yield event.plain_result(f"❌ 获取文件 '{full_path_with_storage}' 信息失败：{file.msg}")
+        return
 
-        downloaded_file_name = os.path.basename(file_path)
+    file_size = file.data.size or 0
+    if self.direct_threshold and file_size > self.direct_threshold:
+        link = await self._direct_link(storage_key, file_path, file.data.url)
+        yield event.plain_result(
+            f"📎 文件 '{downloaded_file_name}'（{self._human_readable_size(file_size)}）较大，请通过链接直接下载：\n{link}")
+        return
 
-        file_content_bytes = requests.get(file.data.url).content
+    async def run(job: Job):
+        job.items_total = 1
+        job.bytes_total = file_size
+
+        # 续传数据的文件名由存储源与路径决定，中断后再次下载同一文件即可续传；
+        # 完成的文件按任务单独命名，同一文件的多个任务互不覆盖
+        path_hash = hashlib.sha1(f"{storage_key}:{file_path}".encode("utf-8")).hexdigest()[:12]
+        resume_path = os.path.join(self._work_dir, f"{path_hash}_{downloaded_file_name}")
+        local_path = os.path.join(self._work_dir, f"{path_hash}_{job.id}_{downloaded_file_name}")
+
+        await asyncio.to_thread(RangeDownloader.sweep, self._work_dir, STALE_DOWNLOAD_AGE)
+        # 用户主动取消时不再保留续传数据；失败的下载保留，由定期清理回收
+        job.cleanup_paths.append(local_path)
+        await asyncio.to_thread(
+            self.downloader.download,
+            file.data.url,
+            local_path,
+            progress=job.add_bytes,
+            check_cancelled=job.check_cancelled,
+            resume_path=resume_path,
+            cancel_errors=(JobCancelled,),
+        )
 
-        if file_content_bytes:
-            yield event.file_result(file_content_bytes, downloaded_file_name)
-            yield event.plain_result(f"✅ 文件 '{downloaded_file_name}' 下载成功！")
-        else:
-            yield event.plain_result(f"❌ 文件 '{downloaded_file_name}' 下载失败：文件内容为空。")
+        if not os.path.getsize(local_path):
+            raise ValueError(f"文件 '{downloaded_file_name}' 内容为空。")
+        job.add_items()
+        return [
+            File(name=downloaded_file_name, file=local_path),
+            Plain(f"✅ 文件 '{downloaded_file_name}' 下载成功！"),
+        ]
+
+    job = self.jobs.submit("download", f"下载 {full_path_with_storage}", uid, event.unified_msg_origin, run)
+    yield event.plain_result(f"📥 已提交下载任务 {job.id}，完成后会推送到当前会话。可使用 任务状态 {job.id} 查看进度。")
+
+
+@filter.command("预览")
+async def cmd_preview(self, event: AstrMessageEvent):
+    uid = self._uid(event)
+    if not self._check_permission(uid, "download", "download_admin_only"):
+        yield event.plain_result("你没有权限执行预览操作。")
+        return
+
+    parts = event.message_str.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        yield event.plain_result(
+            "预览命令格式：预览 storageKey:path/to/file 或 预览 storageKey:/folder。例如：预览 local:/photos/a.jpg")
+        return
+
+    storage_key, file_path = self._split_storage_path(parts[1].strip())
+    logger.info(f"[ZFilePlugin] 预览: storage_key={storage_key}, file_path={file_path}")
+
+    file_list_module = FileListModule(self.zf)  # noqa: F405
+    try:
+        file = await asyncio.to_thread(file_list_module.storage_files_item, storage_key=storage_key, path=file_path)
+        if file.code != "0" or not file.data:
+            yield event.plain_result(f"❌ 获取 '{parts[1].strip()}' 信息失败：{file.msg}")
+            return
+
+        items = [file.data]
+        if file.data.type == "FOLDER":
+            # 文件夹：预览其中前若干个图片/视频
+            files_list = self.listing_cache.get(storage_key, file_path)
+            if files_list is None:
+                generation = self.listing_cache.generation(storage_key)
+                files_list = await self._fetch_listing(storage_key, file_path)
+                if files_list is None:
+                    yield event.plain_result(f"无法获取路径 '{file_path}' 下的文件列表，请检查配置或API连接。")
+                    return
+                self.listing_cache.put(storage_key, file_path, files_list, generation=generation)
+            items = [item for item in files_list
+                     if item.type != "FOLDER" and self.thumbnails.media_kind(item.name)][:self.preview_max_items]
+            if not items:
+                yield event.plain_result(f"路径 '{file_path}' 下没有可预览的图片或视频。")
+                return
+            # 列表缓存不保存下载地址，按需补齐
+            missing = [item for item in items if not item.url]
+            if missing:
+                responses = await self.async_zf.item_many(
+                    [(storage_key, posixpath.join(item.path or file_path, item.name)) for item in missing])
+                for item, res in zip(missing, responses):
+                    if res.ok and res.data:
+                        item.url = res.data.url
     except Exception as e:
-        logger.error(f"[ZFilePlugin] 下载文件时出错：{e}", exc_info=True)
-        yield event.plain_result(f"处理下载文件时发生错误：{e}")
+        logger.error(f"[ZFilePlugin] 预览时出错：{e}", exc_info=True)
+        yield event.plain_result(f"预览失败：{e}")
+        return
+
+    results = await asyncio.gather(
+        *[self.thumbnails.preview(storage_key, item) for item in items], return_exceptions=True)
+    errors = []
+    for item, result in zip(items, results):
+        if isinstance(result, Exception):
+            logger.warning(f"[ZFilePlugin] 生成 '{item.name}' 预览失败：{result}")
+            errors.append(f"❌ '{item.name}'：{result}")
+        else:
+            yield event.image_result(result)
+    if errors:
+        yield event.plain_result("\n".join(errors))
 
 
 @filter.command("生成短链")
@@ -256,7 +765,7 @@ async def cmd_generate_short_link(self, event: AstrMessageEvent):
         response = direct_short_chain_module.short_link_batch_generate(
             storage_key=storage_key,
             paths=[file_path],
-            expire_time=86400,
+            expire_time=self.short_link_expire_time,
         )
         if not response.msg == "ok":
             yield event.plain_result(f"生成短链失败：{response.msg}")
@@ -278,7 +787,7 @@ async def cmd_search(self, event: AstrMessageEvent):
     parts = event.message_str.strip().split(maxsplit=3)
     if len(parts) < 2:
         yield event.plain_result(
-            "搜索命令格式：搜索 [关键词] [storageKey(可选)] [路径(可选)]。例如：搜索 document local /")
+            "搜索命令格式：搜索 [关键词] [storageKey(可选，省略或 * 表示搜索全部存储源)] [路径(可选)]。例如：搜索 document local /")
         return
 
     keyword = parts[1].strip()
@@ -292,6 +801,35 @@ async def cmd_search(self, event: AstrMessageEvent):
 
     logger.info(f"[ZFilePlugin] 搜索命令: keyword='{keyword}', storage_key={storage_key}, path={path}")
 
+    if storage_key in (None, "*", "全部"):
+        try:
+            searched = await self._search_all_storages(keyword, path)
+        except Exception as e:
+            logger.error(f"[ZFilePlugin] 跨存储源搜索时出错：{e}", exc_info=True)
+            yield event.plain_result(f"搜索失败：{e}")
+            return
+        if searched is None:
+            yield event.plain_result("没有启用搜索的存储源。")
+            return
+        merged, slow, errors = searched
+
+        response_lines = [f"搜索结果（关键词：'{keyword}'，全部存储源）：" if merged
+                          else f"没有找到与 '{keyword}' 匹配的内容。"]
+        for result_storage_key, item in merged[:50]:
+            location = f"{result_storage_key}:{item.path}"
+            if item.is_folder:
+                response_lines.append(f"📁 {item.name}/ ({location})")
+            else:
+                response_lines.append(f"📄 {item.name} ({self._human_readable_size(item.size)}) ({location})")
+        if len(merged) > 50:
+            response_lines.append(f"……共 {len(merged)} 项，仅显示最相关的 50 项。")
+        if slow:
+            response_lines.append(f"⚠️ 以下存储源在 {self.search_timeout:g}s 内未返回，仅包含其已缓存目录中的结果：{', '.join(slow)}")
+        if errors:
+            response_lines.append("⚠️ 部分存储源搜索失败：\n" + "\n".join(errors))
+        yield event.plain_result("\n".join(response_lines))
+        return
+
     file_list_module = FileListModule(self.zf)  # noqa: F405
     try:
         files = file_list_module.storage_search(
@@ -321,7 +859,18 @@ async def cmd_search(self, event: AstrMessageEvent):
         yield event.plain_result("\n".join(response_lines))
     except Exception as e:
         logger.error(f"[ZFilePlugin] 搜索时出错：{e}", exc_info=True)
-        yield event.plain_result(f"搜索失败：{e}")
+        cached = self.listing_cache.search(storage_key, keyword, path)
+        if not cached:
+            yield event.plain_result(f"搜索失败：{e}")
+            return
+
+        response_lines = [f"搜索失败：{e}", f"以下为已缓存目录中与 '{keyword}' 匹配的内容："]
+        for item in cached[:50]:
+            if item.is_folder:
+                response_lines.append(f"📁 {item.name}/ ({item.path})")
+            else:
+                response_lines.append(f"📄 {item.name} ({self._human_readable_size(item.size)}) ({item.path})")
+        yield event.plain_result("\n".join(response_lines))
 
 
 @filter.command("删除")
@@ -384,6 +933,7 @@ async def cmd_delete(self, event: AstrMessageEvent):
                 delete_items=items,
             )
             if res.code == "0":
+                self.listing_cache.invalidate(storage_key)
                 results.append(f"✅ 从存储源 '{storage_key}' 删除了 {len(items)} 个项目。")
             else:
                 results.append(f"❌ 从存储源 '{storage_key}' 删除失败：{res.msg}")
@@ -394,6 +944,154 @@ async def cmd_delete(self, event: AstrMessageEvent):
     yield event.plain_result("\n".join(results))
 
 
+@filter.command("批量移动")
+async def cmd_batch_move(self, event: AstrMessageEvent):
+    async for result in self._move_or_copy(event, "move"):
+        yield result
+
+
+@filter.command("批量复制")
+async def cmd_batch_copy(self, event: AstrMessageEvent):
+    async for result in self._move_or_copy(event, "copy"):
+        yield result
+
+
+@filter.command("批量重命名")
+async def cmd_batch_rename(self, event: AstrMessageEvent):
+    uid = self._uid(event)
+    if not self._check_permission(uid, "operate", "operate_admin_only"):
+        yield event.plain_result("你没有权限执行重命名操作。")
+        return
+
+    parts = event.message_str.strip().split(maxsplit=1)
+    args = parts[1].strip() if len(parts) > 1 else ""
+    # 第一个参数中带 "=" 时为 路径=新名称 形式（新名称可含空格），否则为 通配符 + 模板 形式
+    pair_mode = "=" in args.split(maxsplit=1)[0] if args else False
+    if not args or (not pair_mode and len(args.split(maxsplit=1)) < 2):
+        yield event.plain_result(
+            "批量重命名命令格式：\n"
+            "批量重命名 [storageKey:]path1=新名称1,[storageKey:]path2=新名称2\n"
+            "批量重命名 [storageKey:]path或通配符,... 新名称模板（可用 {name} {stem} {ext} {index}）\n"
+            "例如：批量重命名 local:/photos/*.jpeg {stem}.jpg"
+        )
+        return
+
+    if not pair_mode:
+        patterns, template = args.split(maxsplit=1)
+        template = template.strip()
+        items, results = await self._expand_patterns([p.strip() for p in patterns.split(',')])
+        renames = []
+        for index, (storage_key, item) in enumerate(items, start=1):
+            stem, ext = posixpath.splitext(item.name)
+            try:
+                new_name = template.format(name=item.name, stem=stem, ext=ext, index=index)
+            except (KeyError, IndexError, ValueError) as e:
+                yield event.plain_result(f"新名称模板错误：{e}")
+                return
+            error = self._invalid_new_name(new_name)
+            if error:
+                results.append(f"❌ '{item.name}' -> '{new_name}'：{error}。跳过。")
+                continue
+            renames.append((storage_key, item, new_name))
+    else:
+        targets, results = [], []
+        for pair in (p.strip() for p in args.split(',')):
+            if "=" not in pair:
+                results.append(f"❌ '{pair}' 缺少新名称，应为 路径=新名称。跳过。")
+                continue
+            source, new_name = pair.rsplit("=", 1)
+            new_name = new_name.strip()
+            error = self._invalid_new_name(new_name)
+            if error:
+                results.append(f"❌ '{source.strip()}'：{error}。跳过。")
+                continue
+            targets.append((*self._split_storage_path(source), new_name))
+        found = await asyncio.gather(
+            *[self._expand_pattern(storage_key, path) for storage_key, path, _ in targets],
+            return_exceptions=True,
+        )
+        renames = []
+        for (storage_key, path, new_name), res in zip(targets, found):
+            if isinstance(res, Exception):
+                results.append(f"❌ 无法获取 '{storage_key}:{path}'：{res}")
+            elif len(res) != 1:
+                results.append(f"❌ '{storage_key}:{path}' 匹配到 {len(res)} 项，路径=新名称 形式只支持单个项目。")
+            else:
+                renames.append((storage_key, res[0], new_name))
+
+    file_operation_module = FileOperationModule(self.zf)  # noqa: F405
+
+    async def run(storage_key: str, item, new_name: str):
+        rename = file_operation_module.rename_folder if item.type == "FOLDER" else file_operation_module.rename_file
+        res = await self._call_sdk(rename, storage_key=storage_key, path=item.path, name=item.name, new_name=new_name)
+        if res.code != "0":
+            return 0, 1, [f"❌ 重命名 '{item.name}' 失败：{res.msg}"]
+        return 1, 0, []
+
+    coros = [run(storage_key, item, new_name) for storage_key, item, new_name in renames if new_name != item.name]
+    if not coros:
+        yield event.plain_result("\n".join(results) or "没有需要重命名的项目。")
+        return
+
+    logger.info(f"[ZFilePlugin] 批量重命名 {len(coros)} 项")
+    if results:
+        yield event.plain_result("\n".join(results))
+    async for result in self._run_batch(event, "批量重命名", coros):
+        yield result
+    for storage_key in {storage_key for storage_key, _, _ in renames}:
+        self.listing_cache.invalidate(storage_key)
+
+
+@filter.command("任务状态")
+async def cmd_job_status(self, event: AstrMessageEvent):
+    uid = self._uid(event)
+    parts = event.message_str.strip().split(maxsplit=1)
+    if len(parts) > 1:
+        job = self.jobs.get(parts[1].strip())
+        if job is None or (job.owner != uid and not self._check_admin(uid)):
+            yield event.plain_result(f"未找到任务 '{parts[1].strip()}'。")
+            return
+        yield event.plain_result(job.progress_text(self._human_readable_size))
+        return
+
+    jobs = self.jobs.list(None if self._check_admin(uid) else uid)
+    if not jobs:
+        yield event.plain_result("当前没有后台任务。")
+        return
+    lines = ["后台任务："] + [job.progress_text(self._human_readable_size) for job in jobs[-20:]]
+    yield event.plain_result("\n".join(lines))
+
+
+@filter.command("取消任务")
+async def cmd_job_cancel(self, event: AstrMessageEvent):
+    uid = self._uid(event)
+    parts = event.message_str.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        yield event.plain_result("取消任务命令格式：取消任务 [任务ID]。任务ID可通过 任务状态 查看。")
+        return
+
+    job_id = parts[1].strip()
+    job = self.jobs.get(job_id)
+    if job is None or (job.owner != uid and not self._check_admin(uid)):
+        yield event.plain_result(f"未找到任务 '{job_id}'。")
+        return
+    if self.jobs.cancel(job_id):
+        yield event.plain_result(f"🛑 已请求取消任务 {job_id}。")
+    else:
+        yield event.plain_result(f"任务 {job_id} 已结束（{Job.STATUS_TEXT[job.status]}），无法取消。")
+
+
+@filter.command("缓存统计")
+async def cmd_cache_stats(self, event: AstrMessageEvent):
+    uid = self._uid(event)
+    if not self._check_admin(uid):
+        yield event.plain_result("仅管理员可查询缓存统计。")
+        return
+
+    status = "已开启" if self.prefetch_enabled else "未开启"
+    yield event.plain_result(f"目录预取：{status}\n{self.prefetcher.stats_text()}")
+
+
 @filter.command("获取存储源列表")
 async def cmd_storage_list(self, event: AstrMessageEvent):
     uid = self._uid(event)
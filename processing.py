@@ -0,0 +1,111 @@
+import fnmatch
+import mimetypes
+import os
+
+from astrbot.api import logger
+
+from .workers import Image, SpawnPool, compress_bytes, transcode_image, zstandard
+
+
+# mimetypes 未收录的常见文本扩展名
+TEXT_EXTENSIONS = {
+    ".log": "text/plain",
+    ".out": "text/plain",
+    ".ini": "text/plain",
+    ".cfg": "text/plain",
+    ".conf": "text/plain",
+    ".env": "text/plain",
+    ".properties": "text/plain",
+    ".toml": "text/plain",
+    ".yaml": "text/plain",
+    ".yml": "text/plain",
+    ".ndjson": "application/x-ndjson",
+    ".jsonl": "application/x-ndjson",
+}
+
+
+def guess_mime(file_name: str, data: bytes) -> str:
+    """按扩展名判断 MIME 类型；无法判断时检查开头内容，是 UTF-8 文本则视为 text/plain。
+
+    轮转日志（如 app.log.1）按去掉数字后缀后的扩展名判断。
+    """
+    mime = mimetypes.guess_type(file_name)[0]
+    if mime:
+        return mime
+    root, ext = os.path.splitext(file_name.lower())
+    if ext[1:].isdigit():
+        ext = os.path.splitext(root)[1]
+    if ext in TEXT_EXTENSIONS:
+        return TEXT_EXTENSIONS[ext]
+    head = data[:4096]
+    if head and b"\x00" not in head:
+        try:
+            head.decode("utf-8")
+            return "text/plain"
+        except UnicodeDecodeError as e:
+            # 截断处恰好落在多字节字符中间
+            if e.start >= len(head) - 3:
+                return "text/plain"
+    return "application/octet-stream"
+
+
+class UploadProcessor:
+    """上传前的可选处理阶段：按 MIME 类型压缩文本类文件、重压缩或转码图片。
+
+    处理在进程池中进行，不占用事件循环；结果体积下降不足 min_gain_percent
+    时保留原文件。
+    """
+
+    def __init__(self, options: dict):
+        self.enabled = bool(options.get("enabled", False))
+        self.text_mime_types = options.get("text_mime_types") or []
+        self.text_codec = options.get("text_codec", "gzip")
+        self.image_mime_types = options.get("image_mime_types") or []
+        self.image_mode = options.get("image_mode", "off")
+        self.webp_quality = int(options.get("webp_quality", 0))
+        self.min_gain = int(options.get("min_gain_percent", 10)) / 100
+        self.max_size = int(options.get("max_size_mb", 64)) * 1024 * 1024
+        self.workers = max(1, int(options.get("workers", 2)))
+        self._pool = SpawnPool(self.workers)
+
+        if self.enabled and self.text_codec == "zstd" and zstandard is None:
+            logger.warning("[UploadProcessor] 未安装 zstandard，文本压缩将使用 gzip")
+        if self.enabled and self.image_mode != "off" and Image is None:
+            logger.warning("[UploadProcessor] 未安装 Pillow，已跳过图片处理")
+            self.image_mode = "off"
+
+    @staticmethod
+    def _match(mime: str, patterns: list) -> bool:
+        return any(fnmatch.fnmatchcase(mime, pattern) for pattern in patterns)
+
+    async def process(self, data: bytes, file_name: str) -> tuple:
+        """返回 (数据, 文件名, 处理说明)；未处理时说明为空字符串。"""
+        if not self.enabled or not data or len(data) > self.max_size:
+            return data, file_name, ""
+
+        mime = guess_mime(file_name, data)
+        try:
+            if self.image_mode != "off" and self._match(mime, self.image_mime_types):
+                result = await self._pool.run(transcode_image, data, self.image_mode, self.webp_quality)
+                if result is None:
+                    return data, file_name, ""
+                processed, ext = result
+                new_name = os.path.splitext(file_name)[0] + ext if ext else file_name
+            elif self._match(mime, self.text_mime_types):
+                processed, ext = await self._pool.run(compress_bytes, data, self.text_codec)
+                new_name = file_name + ext
+            else:
+                return data, file_name, ""
+        except Exception as e:
+            logger.warning(f"[UploadProcessor] 处理 {file_name} 失败，上传原文件：{e}")
+            return data, file_name, ""
+
+        gain = 1 - len(processed) / len(data)
+        if gain < self.min_gain:
+            logger.info(f"[UploadProcessor] {file_name} 处理后仅减小 {gain:.1%}，上传原文件")
+            return data, file_name, ""
+        logger.info(f"[UploadProcessor] {file_name} -> {new_name}: {len(data)} -> {len(processed)} B")
+        return processed, new_name, f"{len(data)} B → {len(processed)} B（减小 {gain:.0%}）"
+
+    def shutdown(self):
+        self._pool.shutdown()
@@ -0,0 +1,14 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+# 插件目录本身是一个包（模块间使用相对导入），以固定的包名注册后供测试导入
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "zfile_plugin"
+
+if PACKAGE not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
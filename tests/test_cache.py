@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from zfile_plugin.cache import ListingCache, Prefetcher  # noqa: E402
+from zfile_plugin.entry_store import FileEntry  # noqa: E402
+
+
+def listing(path, *names, folders=()):
+    return [FileEntry(name, path, "FOLDER" if name in folders else "FILE") for name in names]
+
+
+def test_put_and_get_normalizes_path():
+    cache = ListingCache(ttl=60)
+    cache.put("1", "/a/", listing("/a", "x.txt"))
+
+    assert [e.name for e in cache.get("1", "a")] == ["x.txt"]
+    assert cache.get("2", "/a") is None
+
+
+def test_put_with_stale_generation_is_dropped():
+    cache = ListingCache(ttl=60)
+    generation = cache.generation("1")
+    cache.invalidate("1", "/a")
+
+    cache.put("1", "/a", listing("/a", "old.txt"), generation=generation)
+    assert cache.get("1", "/a") is None
+
+    cache.put("1", "/a", listing("/a", "new.txt"), generation=cache.generation("1"))
+    assert [e.name for e in cache.get("1", "/a")] == ["new.txt"]
+
+
+def test_invalidate_only_bumps_its_storage():
+    cache = ListingCache(ttl=60)
+    other = cache.generation("2")
+    cache.invalidate("1")
+
+    cache.put("2", "/", listing("/", "f"), generation=other)
+    assert cache.get("2", "/") is not None
+
+
+def test_prefetch_started_before_invalidate_is_discarded():
+    async def run():
+        cache = ListingCache(ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def fetch(storage_key, path):
+            started.set()
+            await release.wait()
+            return listing(path, "stale.txt")
+
+        prefetcher = Prefetcher(cache, fetch, children=1)
+        prefetcher.schedule("1", "/", listing("/", "sub", folders=("sub",)))
+        await started.wait()
+        cache.invalidate("1", "/")
+        release.set()
+        await asyncio.gather(*prefetcher._tasks)
+        return cache.get("1", "/sub")
+
+    assert asyncio.run(run()) is None
+
+
+def test_lookup_reads_cached_parent():
+    cache = ListingCache(ttl=60)
+    cache.put("1", "/", listing("/", "file.txt", "dir", folders=("dir",)))
+
+    assert cache.lookup("1", "/file.txt").name == "file.txt"
+    assert cache.lookup("1", "/missing") is None
+    assert cache.lookup("1", "/dir/inner") is None
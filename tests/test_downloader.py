@@ -0,0 +1,156 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from zfile_plugin.downloader import RangeDownloader  # noqa: E402
+
+CHUNK = 64 * 1024
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    files: dict = {}
+    support_range = True
+    range_requests: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        data = self.files[self.path]
+        header = self.headers.get("Range")
+        if header and self.support_range:
+            type(self).range_requests.append(header)
+            start, end = header[len("bytes="):].split("-")
+            start, end = int(start), min(int(end), len(data) - 1)
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = data[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture
+def server():
+    _Handler.files = {}
+    _Handler.support_range = True
+    _Handler.range_requests = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield _Handler, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class _Stop(Exception):
+    pass
+
+
+def test_parallel_ranges(server, tmp_path):
+    handler, base = server
+    handler.files["/f"] = os.urandom(5 * CHUNK + 123)
+    dest = tmp_path / "f"
+
+    downloader = RangeDownloader(segments=3, min_segment_size=CHUNK, chunk_size=CHUNK)
+    assert downloader.download(base + "/f", str(dest)) == len(handler.files["/f"])
+    assert dest.read_bytes() == handler.files["/f"]
+    assert not (tmp_path / "f.part").exists()
+    assert not (tmp_path / "f.state.json").exists()
+
+
+def test_resume_after_interruption(server, tmp_path):
+    handler, base = server
+    data = os.urandom(40 * CHUNK)
+    handler.files["/f"] = data
+    dest, resume = tmp_path / "out", tmp_path / "resume"
+    # 每个分块刷盘一次状态，便于在中途中断后检查续传
+    downloader = RangeDownloader(segments=1, min_segment_size=len(data), chunk_size=CHUNK // 16)
+
+    calls = 0
+
+    def stop_midway():
+        nonlocal calls
+        calls += 1
+        if calls > 200:
+            raise _Stop()
+
+    with pytest.raises(_Stop):
+        downloader.download(base + "/f", str(dest), check_cancelled=stop_midway, resume_path=str(resume))
+    assert (tmp_path / "resume.part").exists()
+    assert (tmp_path / "resume.state.json").exists()
+
+    handler.range_requests.clear()
+    reported = []
+    assert downloader.download(base + "/f", str(dest), progress=reported.append, resume_path=str(resume)) == len(data)
+    assert dest.read_bytes() == data
+    # 续传先回报已完成的字节数，且只请求缺失的部分
+    assert 0 < reported[0] < len(data)
+    assert sum(reported) == len(data)
+    assert all(not r.startswith("bytes=0-") for r in handler.range_requests[1:])
+    assert not (tmp_path / "resume.part").exists()
+
+
+def test_cancel_errors_discard_resume_data(server, tmp_path):
+    handler, base = server
+    handler.files["/f"] = os.urandom(8 * CHUNK)
+    dest = tmp_path / "f"
+
+    def cancel():
+        raise _Stop()
+
+    downloader = RangeDownloader(segments=2, min_segment_size=CHUNK, chunk_size=CHUNK)
+    with pytest.raises(_Stop):
+        downloader.download(base + "/f", str(dest), check_cancelled=cancel, cancel_errors=(_Stop,))
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_file(server, tmp_path):
+    handler, base = server
+    handler.files["/empty"] = b""
+    dest = tmp_path / "empty"
+
+    assert RangeDownloader().download(base + "/empty", str(dest)) == 0
+    assert dest.read_bytes() == b""
+
+
+def test_falls_back_without_range_support(server, tmp_path):
+    handler, base = server
+    handler.support_range = False
+    handler.files["/f"] = os.urandom(3 * CHUNK)
+    dest = tmp_path / "f"
+    reported = []
+
+    assert RangeDownloader(segments=4, min_segment_size=CHUNK).download(
+        base + "/f", str(dest), progress=reported.append) == len(handler.files["/f"])
+    assert dest.read_bytes() == handler.files["/f"]
+    assert sum(reported) == len(handler.files["/f"])
+    assert not (tmp_path / "f.state.json").exists()
+
+
+def test_sweep_skips_fresh_and_active_files(tmp_path):
+    old, fresh = tmp_path / "old.part", tmp_path / "fresh.part"
+    old.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    os.utime(old, (0, 0))
+    (tmp_path / "thumbnails").mkdir()
+
+    assert RangeDownloader.sweep(str(tmp_path), 3600) == 1
+    assert sorted(os.listdir(tmp_path)) == ["fresh.part", "thumbnails"]
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from zfile_plugin.entry_store import EntryStore, FileEntry
+
+
+def make_dir(path, names, folders=()):
+    return [FileEntry(name, path, "FOLDER" if name in folders else "FILE", len(name), datetime(2024, 1, 1))
+            for name in names]
+
+
+def test_list_dir_keeps_server_order():
+    store = EntryStore()
+    store.put_dir("/a", make_dir("/a", ["zeta", "alpha", "mid"], folders=("mid",)))
+
+    entries = store.list_dir("/a")
+    assert [e.name for e in entries] == ["zeta", "alpha", "mid"]
+    assert [e.is_folder for e in entries] == [False, False, True]
+    assert entries[0].time == datetime(2024, 1, 1)
+    assert entries[0].url is None
+    assert store.list_dir("/missing") is None
+
+
+def test_lookup_uses_name_order():
+    store = EntryStore()
+    names = ["b.txt", "报告.docx", "a.txt", "c", "A.txt"]
+    store.put_dir("/docs", make_dir("/docs", names))
+
+    for name in names:
+        entry = store.lookup("/docs", name)
+        assert entry is not None and entry.name == name
+    assert store.lookup("/docs", "missing") is None
+    assert store.lookup("/other", "a.txt") is None
+
+
+def test_put_dir_replaces_and_drop_dir_removes():
+    store = EntryStore()
+    store.put_dir("/a", make_dir("/a", ["one", "two"]))
+    store.put_dir("/a", make_dir("/a", ["three"]))
+
+    assert [e.name for e in store.list_dir("/a")] == ["three"]
+    assert store.lookup("/a", "one") is None
+    assert len(store) == 1
+
+    store.drop_dir("/a")
+    assert not store.has_dir("/a")
+    assert len(store) == 0
+
+
+def test_compact_keeps_live_entries_and_prunes_parents():
+    store = EntryStore()
+    store.put_dir("/keep", make_dir("/keep", ["y", "x"]))
+    for i in range(2000):
+        store.put_dir(f"/tmp{i}", make_dir(f"/tmp{i}", ["f"]))
+        store.drop_dir(f"/tmp{i}")
+
+    # 空洞超过存活数据后自动整理
+    assert store._dead < 1024
+    store.compact()
+    assert store._dead == 0
+    assert store._parents == ["/keep"]
+    assert [e.name for e in store.list_dir("/keep")] == ["y", "x"]
+    assert store.lookup("/keep", "x").name == "x"
+    assert store.lookup("/keep", "y").name == "y"
+
+
+def test_scan_by_prefix_and_keyword():
+    store = EntryStore()
+    store.put_dir("/data", make_dir("/data", ["Report.txt", "sub"], folders=("sub",)))
+    store.put_dir("/data/sub", make_dir("/data/sub", ["report-2.txt", "image.png"]))
+    store.put_dir("/database", make_dir("/database", ["report-3.txt"]))
+
+    assert {e.name for e in store.scan("/data")} == {"Report.txt", "sub", "report-2.txt", "image.png"}
+    assert {e.name for e in store.scan("/data", "REPORT")} == {"Report.txt", "report-2.txt"}
+    assert {e.name for e in store.scan("/", "report")} == {"Report.txt", "report-2.txt", "report-3.txt"}
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from typing import Optional
+
+import requests
+from astrbot.api import logger
+
+from .workers import Image, SpawnPool, make_thumbnail
+
+
+def extract_exif_thumbnail(data: bytes) -> Optional[bytes]:
+    """从 JPEG 开头的 EXIF(APP1) 段中取出内嵌缩略图，没有时返回 None。"""
+    if not data.startswith(b"\xff\xd8") or data[2:4] != b"\xff\xe1":
+        return None
+    length = int.from_bytes(data[4:6], "big")
+    segment = data[6:4 + length]
+    if not segment.startswith(b"Exif\x00\x00"):
+        return None
+    start = segment.find(b"\xff\xd8\xff", 6)
+    end = segment.find(b"\xff\xd9", start)
+    if start < 0 or end < 0:
+        return None
+    return segment[start:end + 2]
+
+
+class ThumbnailCache:
+    """磁盘 LRU 缓存，键为 存储源+路径+修改时间，按文件修改时间淘汰最久未用的缩略图。
+
+    方法都会访问磁盘，应在线程中调用。总大小在首次使用时统计一次，之后随写入累加，
+    只有超过上限时才重新扫描目录并淘汰到上限的九成。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, ext: str):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self._total: Optional[int] = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, storage_key: str, path: str, modified) -> str:
+        # 列表缓存与接口返回的时间对象类型可能不同，统一换算为时间戳
+        stamp = modified.timestamp() if hasattr(modified, "timestamp") else modified
+        key = hashlib.sha1(f"{storage_key}:{path}:{stamp}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.{self.ext}")
+
+    def get(self, cache_path: str) -> Optional[str]:
+        try:
+            os.utime(cache_path)
+        except OSError:
+            # 不存在或刚被淘汰，视为未命中
+            return None
+        return cache_path
+
+    def put(self, cache_path: str, data: bytes) -> str:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(cache_path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, cache_path)
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._entries())
+            else:
+                self._total += len(data) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+        return cache_path
+
+    def _entries(self) -> list:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(self.ext):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+
+class ThumbnailService:
+    """为图片/视频生成预览缩略图。
+
+    图片先用 Range 请求只取开头部分，若 JPEG 中带有 EXIF 内嵌缩略图则直接使用；
+    否则在大小上限内拉取整张图片，在进程池中缩放。视频通过 ffmpeg 直接读取
+    远程地址截取一帧。生成结果写入磁盘缓存，重复预览不再访问后端。
+    """
+
+    HEAD_BYTES = 64 * 1024
+
+    def __init__(self, cache_dir: str, options: dict):
+        self.max_side = int(options.get("thumbnail_size", 320))
+        self.format = options.get("thumbnail_format", "jpeg")
+        self.max_image_bytes = int(options.get("preview_max_image_mb", 20)) * 1024 * 1024
+        self.cache = ThumbnailCache(cache_dir, int(options.get("thumbnail_cache_mb", 100)) * 1024 * 1024,
+                                    "webp" if self.format == "webp" else "jpg")
+        self.ffmpeg = shutil.which("ffmpeg")
+        self._pool = SpawnPool(2)
+        # 缓存路径 -> [锁, 等待与持有者数量]
+        self._locks: dict = {}
+
+    @staticmethod
+    def media_kind(name: str) -> Optional[str]:
+        mime = mimetypes.guess_type(name or "")[0] or ""
+        if mime.startswith("image/"):
+            return "image"
+        if mime.startswith("video/"):
+            return "video"
+        return None
+
+    async def preview(self, storage_key: str, item) -> str:
+        """返回缩略图的本地路径；无法生成时抛出 ValueError。"""
+        full_path = f"{(item.path or '/').rstrip('/')}/{item.name}"
+        cache_path = self.cache.path_for(storage_key, full_path, item.time)
+        cached = await asyncio.to_thread(self.cache.get, cache_path)
+        if cached:
+            return cached
+
+        # 同一文件的并发预览只生成一次；锁在最后一个使用者离开后才移除
+        entry = self._locks.setdefault(cache_path, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                cached = await asyncio.to_thread(self.cache.get, cache_path)
+                if cached:
+                    return cached
+                kind = self.media_kind(item.name)
+                if kind and not item.url:
+                    raise ValueError("无法获取文件的下载地址")
+                if kind == "image":
+                    data = await self._image_thumbnail(item)
+                elif kind == "video":
+                    data = await self._video_thumbnail(item)
+                else:
+                    raise ValueError(f"'{item.name}' 不是图片或视频文件")
+                return await asyncio.to_thread(self.cache.put, cache_path, data)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(cache_path, None)
+
+    async def _image_thumbnail(self, item) -> bytes:
+        if Image is None:
+            raise ValueError("未安装 Pillow，无法生成图片预览")
+        head = await asyncio.to_thread(self._fetch, item.url, self.HEAD_BYTES)
+        embedded = extract_exif_thumbnail(head)
+        if embedded:
+            try:
+                return await self._pool.run(make_thumbnail, embedded, self.max_side, self.format)
+            except Exception as e:
+                logger.debug(f"[ThumbnailService] 内嵌缩略图无效，改用原图：{e}")
+
+        size = item.size or 0
+        if size > self.max_image_bytes:
+            raise ValueError(f"图片过大（超过 {self.max_image_bytes // (1024 * 1024)} MB）且没有内嵌缩略图")
+        data = head if size and len(head) >= size else await asyncio.to_thread(self._fetch, item.url, None)
+        return await self._pool.run(make_thumbnail, data, self.max_side, self.format)
+
+    async def _video_thumbnail(self, item) -> bytes:
+        if not self.ffmpeg:
+            raise ValueError("未安装 ffmpeg，无法生成视频预览")
+        codec = "libwebp" if self.format == "webp" else "mjpeg"
+        proc = await asyncio.create_subprocess_exec(
+            self.ffmpeg, "-v", "error", "-ss", "1", "-i", item.url, "-frames:v", "1",
+            "-vf", f"scale='min({self.max_side},iw)':'min({self.max_side},ih)':force_original_aspect_ratio=decrease", "-c:v", codec, "-f", "image2", "pipe:1",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=60)
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise ValueError("截取视频帧超时")
+        if proc.returncode != 0 or not stdout:
+            raise ValueError(f"截取视频帧失败：{stderr.decode(errors='ignore').strip()[:200]}")
+        return stdout
+
+    def _fetch(self, url: str, limit: Optional[int]) -> bytes:
+        headers = {"Range": f"bytes=0-{limit - 1}"} if limit else {}
+        with requests.get(url, headers=headers, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            buffer = bytearray()
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                buffer.extend(chunk)
+                if limit and len(buffer) >= limit:
+                    return bytes(buffer[:limit])
+                if len(buffer) > self.max_image_bytes:
+                    raise ValueError(f"图片过大（超过 {self.max_image_bytes // (1024 * 1024)} MB）")
+            return bytes(buffer)
+
+    def shutdown(self):
+        self._pool.shutdown()
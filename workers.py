@@ -0,0 +1,83 @@
+# 在进程池子进程中执行的函数，只接收和返回可序列化的简单类型。
+# 子进程以 spawn 方式启动并重新导入本模块，因此这里不能导入 astrbot 或插件的其他模块。
+import asyncio
+import gzip
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class SpawnPool:
+    """按需创建的进程池，供插件在事件循环中提交本模块的函数。
+
+    AstrBot 进程中有多个线程，fork 出的子进程可能继承被其他线程占用的锁，
+    因此子进程以 spawn 方式启动。
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, func, *args):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def compress_bytes(data: bytes, codec: str) -> tuple:
+    """压缩数据，返回 (压缩后的数据, 文件扩展名)。未安装 zstandard 时退回 gzip。"""
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".zst"
+    return gzip.compress(data, compresslevel=6), ".gz"
+
+
+def transcode_image(data: bytes, mode: str, webp_quality: int) -> Optional[tuple]:
+    """无损重压缩或转码为 WebP，返回 (新数据, 新扩展名或空串)；无法处理时返回 None。
+
+    lossless 模式只对 PNG 做无损优化，JPEG 重新编码会损失画质因此跳过；
+    webp 模式下 webp_quality 为 0 时使用无损 WebP。
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, "is_animated", False):
+            return None
+        out = io.BytesIO()
+        if mode == "webp":
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+            if webp_quality > 0:
+                img.save(out, format="WEBP", quality=webp_quality, method=6)
+            else:
+                img.save(out, format="WEBP", lossless=True, method=6)
+            return out.getvalue(), ".webp"
+        if img.format == "PNG":
+            img.save(out, format="PNG", optimize=True)
+            return out.getvalue(), ""
+    return None
+
+
+def make_thumbnail(data: bytes, max_side: int, fmt: str) -> bytes:
+    with Image.open(io.BytesIO(data)) as img:
+        img.seek(0)
+        img.thumbnail((max_side, max_side))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), quality=80)
+        return out.getvalue()
@@ -1,11 +1,16 @@
 # zfile_sdk_client.py
 
+import asyncio
 import json
 import os
 import io
+from typing import Iterable, Optional
+import aiohttp
 import requests # Still needed for raw file uploads if SDK doesn't abstract it fully
 from astrbot.api import logger
 
+from .entry_store import FileEntry
+
 # Import all necessary modules from ZFile SDK Front
 # Assuming ZFileSDK.front is directly importable or in the python path
 # If not, a relative import like 'from .front import ...' might be needed
@@ -403,4 +408,147 @@ class ZFileClient:
         elif method == "DELETE":
             return self.api_client.delete(endpoint=path, data=body)
         else:
-            return {"code": -1, "msg": f"Unsupported HTTP method for custom_request: {method}"}
\ No newline at end of file
+            return {"code": -1, "msg": f"Unsupported HTTP method for custom_request: {method}"}
+
+
+# Typed, slot-based response objects for the async client. They avoid the
+# per-item dict overhead of the sync client when fanning out many requests.
+# File items use FileEntry from entry_store, shared with the listing cache.
+class StorageEntry:
+    __slots__ = ("key", "name", "type", "search_enable")
+
+    def __init__(self, key: str, name: str, type: str, search_enable: bool):
+        self.key = key
+        self.name = name
+        self.type = type
+        self.search_enable = search_enable
+
+    @classmethod
+    def from_json(cls, item: dict) -> "StorageEntry":
+        return cls(item.get("key"), item.get("name"), item.get("type"), bool(item.get("searchEnable")))
+
+    def __repr__(self):
+        return f"StorageEntry(key={self.key!r}, name={self.name!r}, type={self.type!r})"
+
+
+class ApiResponse:
+    __slots__ = ("code", "msg", "data")
+
+    def __init__(self, code: str, msg: str, data=None):
+        self.code = code
+        self.msg = msg
+        self.data = data
+
+    @property
+    def ok(self) -> bool:
+        return self.code == "0"
+
+    def __repr__(self):
+        return f"ApiResponse(code={self.code!r}, msg={self.msg!r})"
+
+
+class AsyncZFileClient:
+    """
+    Async counterpart of ZFileClient built on one pooled aiohttp session.
+    The *_many helpers fan out requests concurrently (bounded by `concurrency`)
+    and return results in input order; a failed request yields an ApiResponse
+    with code "-1" instead of raising.
+    """
+
+    def __init__(self, base_url: str, access_token: str, concurrency: int = 16, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = max(1, concurrency)
+        self._headers = {"zfile-token": access_token, "Accept": "application/json"}
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> "AsyncZFileClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                timeout=self._timeout,
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                json_serialize=lambda obj: json.dumps(obj, ensure_ascii=False),
+            )
+        return self._session
+
+    async def _request(self, method: str, endpoint: str, payload: dict = None, timeout: float = None) -> dict:
+        kwargs = {"json": payload} if payload is not None else {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        async with self._semaphore:
+            async with self._get_session().request(method, f"{self.base_url}{endpoint}", **kwargs) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    @staticmethod
+    def _response(body: dict, parse=None) -> ApiResponse:
+        code = str(body.get("code"))
+        data = body.get("data")
+        if code == "0" and parse is not None and data is not None:
+            data = parse(data)
+        return ApiResponse(code, body.get("msg", ""), data)
+
+    async def list_dir(self, storage_key: str, path: str = "/", password: str = None) -> ApiResponse:
+        body = await self._request("POST", "/api/storage/files",
+                                   {"storageKey": storage_key, "path": path, "password": password})
+        return self._response(body, lambda data: [FileEntry.from_json(item) for item in data.get("files") or []])
+
+    async def item(self, storage_key: str, path: str, password: str = None) -> ApiResponse:
+        body = await self._request("POST", "/api/storage/file/item",
+                                   {"storageKey": storage_key, "path": path, "password": password})
+        return self._response(body, FileEntry.from_json)
+
+    async def search(self, keyword: str, storage_key: str, path: str = "/", mode: str = "search_all",
+                     timeout: float = None) -> ApiResponse:
+        body = await self._request("POST", "/api/storage/search", {
+            "storageKey": storage_key,
+            "searchKeyword": keyword,
+            "searchMode": mode,
+            "path": path,
+        }, timeout=timeout)
+        return self._response(body, lambda data: [FileEntry.from_json(item) for item in data])
+
+    async def storage_list(self) -> ApiResponse:
+        body = await self._request("GET", "/api/storage/list")
+        return self._response(body, lambda data: [StorageEntry.from_json(item) for item in data])
+
+    @staticmethod
+    async def _gather(coros) -> list[ApiResponse]:
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        responses = []
+        for result in results:
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                logger.error(f"[AsyncZFileClient] !!! Request failed | error={result!r}")
+                result = ApiResponse("-1", str(result) or type(result).__name__)
+            responses.append(result)
+        return responses
+
+    async def list_many(self, targets: Iterable[tuple[str, str]]) -> list[ApiResponse]:
+        """Lists many (storage_key, path) folders concurrently."""
+        return await self._gather([self.list_dir(storage_key, path) for storage_key, path in targets])
+
+    async def item_many(self, targets: Iterable[tuple[str, str]]) -> list[ApiResponse]:
+        """Fetches many (storage_key, path) items concurrently."""
+        return await self._gather([self.item(storage_key, path) for storage_key, path in targets])
+
+    async def search_many(self, keyword: str, storage_keys: Iterable[str], path: str = "/",
+                          mode: str = "search_all") -> dict[str, ApiResponse]:
+        """Searches `keyword` on every storage concurrently, keyed by storage key."""
+        storage_keys = list(storage_keys)
+        responses = await self._gather([self.search(keyword, key, path, mode) for key in storage_keys])
+        return dict(zip(storage_keys, responses))